@@ -1,3 +1,7 @@
+import os
+import subprocess
+import sys
+
 import pytest
 import tsgm
 
@@ -11,14 +15,14 @@ import numpy as np
 from tensorflow import keras
 
 
-def _gen_dataset(seq_len: int, feature_dim: int, batch_size: int):
+def _gen_dataset(seq_len: int, feature_dim: int, batch_size: int, drop_remainder: bool = False):
     data = tsgm.utils.gen_sine_dataset(50, seq_len, feature_dim)
 
     scaler = tsgm.utils.TSFeatureWiseScaler((-1, 1))
     X_train = scaler.fit_transform(data).astype(np.float32)
 
     dataset = tf.data.Dataset.from_tensor_slices(X_train)
-    dataset = dataset.shuffle(buffer_size=1024).batch(batch_size)
+    dataset = dataset.shuffle(buffer_size=1024).batch(batch_size, drop_remainder=drop_remainder)
     return dataset
 
 
@@ -76,6 +80,320 @@ def test_gan():
     assert generated_samples.shape == (10, seq_len, 1)
 
 
+def test_gan_jit_compile():
+    latent_dim = 4
+    feature_dim = 1
+    seq_len = 32
+    batch_size = 16
+
+    dataset = _gen_dataset(seq_len, feature_dim, batch_size)
+    architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+        seq_len=seq_len, feat_dim=feature_dim,
+        latent_dim=latent_dim, output_dim=0)
+    discriminator, generator = architecture.discriminator, architecture.generator
+
+    gan = tsgm.models.cgan.GAN(
+        discriminator=discriminator, generator=generator, latent_dim=latent_dim
+    )
+    gan.compile(
+        d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        loss_fn=keras.losses.BinaryCrossentropy(from_logits=True),
+        jit_compile=True,
+    )
+    gan.fit(dataset, epochs=1)
+
+    generated_samples = gan.generate(10)
+    assert generated_samples.shape == (10, seq_len, 1)
+
+
+@pytest.mark.parametrize("use_wgan", [False, True])
+def test_gan_static_batch_size(use_wgan):
+    latent_dim = 4
+    feature_dim = 1
+    seq_len = 64
+    batch_size = 16
+
+    dataset = _gen_dataset(seq_len, feature_dim, batch_size, drop_remainder=True)
+    architecture = tsgm.models.architectures.zoo["wavegan"](
+        seq_len=seq_len, feat_dim=feature_dim,
+        latent_dim=latent_dim, output_dim=1)
+    discriminator, generator = architecture.discriminator, architecture.generator
+
+    gan = tsgm.models.cgan.GAN(
+        discriminator=discriminator, generator=generator, latent_dim=latent_dim, use_wgan=use_wgan
+    )
+    gan.compile(
+        d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        loss_fn=keras.losses.BinaryCrossentropy(from_logits=True),
+    )
+    gan.fit(dataset, epochs=1)
+
+    generated_samples = gan.generate(10)
+    assert generated_samples.shape == (10, seq_len, 1)
+
+
+def test_wgan_mixed_precision():
+    latent_dim = 2
+    feature_dim = 1
+    seq_len = 64
+    batch_size = 16
+
+    keras.mixed_precision.set_global_policy("mixed_float16")
+    try:
+        dataset = _gen_dataset(seq_len, feature_dim, batch_size)
+        architecture = tsgm.models.architectures.zoo["wavegan"](
+            seq_len=seq_len, feat_dim=feature_dim,
+            latent_dim=latent_dim, output_dim=1)
+        discriminator, generator = architecture.discriminator, architecture.generator
+        gan = tsgm.models.cgan.GAN(
+            discriminator=discriminator, generator=generator, latent_dim=latent_dim, use_wgan=True
+        )
+        gan.compile(
+            d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+            g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+            loss_fn=keras.losses.BinaryCrossentropy(from_logits=True),
+        )
+        assert isinstance(gan.d_optimizer, keras.mixed_precision.LossScaleOptimizer)
+        gan.fit(dataset, epochs=1)
+
+        generated_samples = gan.generate(10)
+        assert generated_samples.shape == (10, seq_len, 1)
+    finally:
+        keras.mixed_precision.set_global_policy("float32")
+
+
+def test_cgan_mixed_precision():
+    latent_dim = 8
+    output_dim = 2
+    feature_dim = 1
+    seq_len = 32
+    batch_size = 16
+
+    keras.mixed_precision.set_global_policy("mixed_float16")
+    try:
+        dataset, labels = _gen_cond_dataset(seq_len, batch_size)
+        architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+            seq_len=seq_len, feat_dim=feature_dim,
+            latent_dim=latent_dim, output_dim=output_dim)
+        discriminator, generator = architecture.discriminator, architecture.generator
+        cond_gan = tsgm.models.cgan.ConditionalGAN(
+            discriminator=discriminator, generator=generator, latent_dim=latent_dim
+        )
+        cond_gan.compile(
+            d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+            g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+            loss_fn=keras.losses.BinaryCrossentropy(from_logits=True),
+        )
+        assert isinstance(cond_gan.g_optimizer, keras.mixed_precision.LossScaleOptimizer)
+        cond_gan.fit(dataset, epochs=1)
+
+        generated_samples = cond_gan.generate(labels[:10])
+        assert generated_samples.shape == (10, seq_len, 1)
+    finally:
+        keras.mixed_precision.set_global_policy("float32")
+
+
+def test_gan_fixed_seeds_reproducible():
+    latent_dim = 4
+    seq_len = 32
+    architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+        seq_len=seq_len, feat_dim=1,
+        latent_dim=latent_dim, output_dim=0)
+    discriminator, generator = architecture.discriminator, architecture.generator
+
+    samples = []
+    for _ in range(2):
+        tsgm.utils.fix_seeds(123)
+        gan = tsgm.models.cgan.GAN(
+            discriminator=discriminator, generator=generator, latent_dim=latent_dim
+        )
+        samples.append(gan.generate(5).numpy())
+    assert np.allclose(samples[0], samples[1])
+
+
+def _build_gan(**compile_kwargs):
+    latent_dim = 4
+    architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+        seq_len=32, feat_dim=1, latent_dim=latent_dim, output_dim=0)
+    gan = tsgm.models.cgan.GAN(
+        discriminator=architecture.discriminator, generator=architecture.generator,
+        latent_dim=latent_dim, use_wgan=True
+    )
+    gan.compile(
+        d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        loss_fn=keras.losses.BinaryCrossentropy(from_logits=True),
+        **compile_kwargs
+    )
+    return gan
+
+
+def test_gan_global_batch_size():
+    gan = _build_gan(global_batch_size=16)
+
+    logits = np.arange(8, dtype=np.float32)[:, None]
+    loss, mean_loss = gan._reduce_loss(gan.wgan_generator_loss(logits))
+    assert np.isclose(loss.numpy(), -logits.sum() / 16)
+    # The trackers get the unscaled mean over the batch
+    assert np.isclose(mean_loss.numpy(), -logits.mean())
+
+
+def test_gan_split_discriminator_loss():
+    latent_dim = 4
+    seq_len = 32
+    batch_size = 8
+    architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+        seq_len=seq_len, feat_dim=1, latent_dim=latent_dim, output_dim=0)
+    gan = tsgm.models.cgan.GAN(
+        discriminator=architecture.discriminator, generator=architecture.generator, latent_dim=latent_dim
+    )
+    loss_fn = keras.losses.BinaryCrossentropy(from_logits=True)
+    gan.compile(
+        d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        loss_fn=loss_fn,
+    )
+
+    real_data = np.random.uniform(-1, 1, (batch_size, seq_len, 1)).astype(np.float32)
+    fake_data = gan.generator(np.random.normal(size=(batch_size, latent_dim)).astype(np.float32))
+    fake_predictions = gan.discriminator(fake_data)
+    real_predictions = gan.discriminator(real_data)
+
+    # Discriminator loss on separate batches, as in `GAN.train_step`
+    fake_loss = tsgm.models.cgan._get_per_example_loss(
+        loss_fn, tsgm.models.cgan._get_labels(batch_size, 1.0), fake_predictions)
+    real_loss = tsgm.models.cgan._get_per_example_loss(
+        loss_fn, tsgm.models.cgan._get_labels(batch_size, 0.0), real_predictions)
+    d_loss, _ = gan._reduce_loss((fake_loss + real_loss) / 2)
+
+    # Discriminator loss on the concatenated batch
+    desc_labels = tf.concat([tf.ones((batch_size, 1)), tf.zeros((batch_size, 1))], axis=0)
+    concat_d_loss = loss_fn(desc_labels, tf.concat([fake_predictions, real_predictions], axis=0))
+
+    assert np.isclose(d_loss.numpy(), concat_d_loss.numpy())
+
+
+def test_gan_scalar_loss():
+    gan = _build_gan()
+
+    labels = np.zeros((8, 1), dtype=np.float32)
+    logits = np.linspace(-2, 2, 8, dtype=np.float32)[:, None]
+    per_example_loss = keras.losses.binary_crossentropy(labels, logits, from_logits=True).numpy()
+
+    sum_loss = keras.losses.BinaryCrossentropy(from_logits=True, reduction=keras.losses.Reduction.SUM)
+    loss = tsgm.models.cgan._get_per_example_loss(sum_loss, labels, logits)
+    assert loss.shape.rank == 0
+    assert np.isclose(loss.numpy(), per_example_loss.sum())
+
+    # Without DP and on a single device, a scalar loss is used as is
+    loss, mean_loss = gan._reduce_loss(loss)
+    assert np.isclose(loss.numpy(), per_example_loss.sum())
+    assert np.isclose(mean_loss.numpy(), per_example_loss.sum())
+
+    with pytest.raises(ValueError):
+        tsgm.models.cgan._average_loss(loss, True, None)
+
+
+def test_cgan_scalar_loss_fn():
+    latent_dim = 8
+    output_dim = 2
+    feature_dim = 1
+    seq_len = 32
+    batch_size = 16
+
+    dataset, labels = _gen_cond_dataset(seq_len, batch_size)
+    architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+        seq_len=seq_len, feat_dim=feature_dim,
+        latent_dim=latent_dim, output_dim=output_dim)
+    discriminator, generator = architecture.discriminator, architecture.generator
+
+    cond_gan = tsgm.models.cgan.ConditionalGAN(
+        discriminator=discriminator, generator=generator, latent_dim=latent_dim
+    )
+    cond_gan.compile(
+        d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        loss_fn=lambda y_true, y_pred: tf.reduce_mean(keras.losses.binary_crossentropy(y_true, y_pred, from_logits=True)),
+    )
+    cond_gan.fit(dataset, epochs=1)
+
+    generated_samples = cond_gan.generate(labels[:10])
+    assert generated_samples.shape == (10, seq_len, 1)
+
+
+def _fit_two_replicas(model: str, use_wgan: bool) -> None:
+    # Runs in a subprocess, where the CPU is split into two logical devices (see `test_fit_two_replicas`)
+    latent_dim = 4
+    feature_dim = 1
+    seq_len = 32
+    batch_size = 16
+
+    strategy = tf.distribute.MirroredStrategy(["/cpu:0", "/cpu:1"])
+    assert strategy.num_replicas_in_sync == 2
+    if model == "GAN":
+        output_dim = 0
+        dataset = _gen_dataset(seq_len, feature_dim, batch_size)
+    else:
+        output_dim = 2
+        dataset, labels = _gen_cond_dataset(seq_len, batch_size)
+
+    with strategy.scope():
+        architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+            seq_len=seq_len, feat_dim=feature_dim,
+            latent_dim=latent_dim, output_dim=output_dim)
+        discriminator, generator = architecture.discriminator, architecture.generator
+        if model == "GAN":
+            gan = tsgm.models.cgan.GAN(
+                discriminator=discriminator, generator=generator, latent_dim=latent_dim, use_wgan=use_wgan
+            )
+        else:
+            gan = tsgm.models.cgan.ConditionalGAN(
+                discriminator=discriminator, generator=generator, latent_dim=latent_dim
+            )
+        gan.compile(
+            d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+            g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+            loss_fn=keras.losses.BinaryCrossentropy(from_logits=True),
+        )
+    history = gan.fit(dataset, epochs=1)
+    assert np.isfinite(history.history["g_loss"]).all()
+    assert np.isfinite(history.history["d_loss"]).all()
+
+    if model == "GAN":
+        generated_samples = gan.generate(10)
+    else:
+        generated_samples = gan.generate(labels[:10])
+    assert generated_samples.shape == (10, seq_len, 1)
+
+
+_FIT_TWO_REPLICAS_SCRIPT = """
+import sys
+import tensorflow as tf
+
+cpus = tf.config.list_physical_devices("CPU")
+tf.config.set_logical_device_configuration(
+    cpus[0], [tf.config.LogicalDeviceConfiguration(), tf.config.LogicalDeviceConfiguration()])
+
+import test_cgan
+test_cgan._fit_two_replicas(sys.argv[1], sys.argv[2] == "True")
+"""
+
+
+@pytest.mark.parametrize("model, use_wgan", [("GAN", False), ("GAN", True), ("ConditionalGAN", False)])
+def test_fit_two_replicas(model, use_wgan):
+    # The logical devices have to be configured before TensorFlow initializes,
+    # so the training runs in a subprocess and the device topology of the other tests is unchanged
+    result = subprocess.run(
+        [sys.executable, "-c", _FIT_TWO_REPLICAS_SCRIPT, model, str(use_wgan)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+
+
 def test_cgan():
     latent_dim = 8
     output_dim = 2
@@ -110,6 +428,64 @@ def test_cgan():
     assert generated_samples.shape == (10, seq_len, 1)
 
 
+def test_cgan_two_input_discriminator():
+    latent_dim = 8
+    output_dim = 2
+    feature_dim = 1
+    seq_len = 32
+    batch_size = 16
+
+    dataset, labels = _gen_cond_dataset(seq_len, batch_size)
+    architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+        seq_len=seq_len, feat_dim=feature_dim,
+        latent_dim=latent_dim, output_dim=output_dim)
+    generator = architecture.generator
+
+    ts_input = keras.Input((seq_len, feature_dim))
+    labels_input = keras.Input((seq_len, output_dim))
+    x = keras.layers.Concatenate(-1)([ts_input, labels_input])
+    x = keras.layers.Conv1D(16, 3, strides=2, padding="same")(x)
+    x = keras.layers.GlobalAvgPool1D()(x)
+    d_output = keras.layers.Dense(1)(x)
+    discriminator = keras.Model([ts_input, labels_input], d_output)
+
+    cond_gan = tsgm.models.cgan.ConditionalGAN(
+        discriminator=discriminator, generator=generator, latent_dim=latent_dim
+    )
+    cond_gan.compile(
+        d_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        g_optimizer=keras.optimizers.Adam(learning_rate=0.0003),
+        loss_fn=keras.losses.BinaryCrossentropy(from_logits=True),
+    )
+    cond_gan.fit(dataset, epochs=1)
+
+    generated_samples = cond_gan.generate(labels[:10])
+    assert generated_samples.shape == (10, seq_len, 1)
+
+
+@pytest.mark.parametrize("static_batch_size", [False, True])
+def test_cgan_rep_labels(static_batch_size):
+    latent_dim = 8
+    output_dim = 2
+    seq_len = 32
+
+    architecture = tsgm.models.architectures.zoo["cgan_base_c4_l1"](
+        seq_len=seq_len, feat_dim=1,
+        latent_dim=latent_dim, output_dim=output_dim)
+    cond_gan = tsgm.models.cgan.ConditionalGAN(
+        discriminator=architecture.discriminator, generator=architecture.generator, latent_dim=latent_dim
+    )
+
+    labels = np.array([[1, 0], [0, 1], [0.25, 0.75]], dtype=np.float32)
+    batch_size = labels.shape[0] if static_batch_size else tf.shape(labels)[0]
+    rep_labels = cond_gan._get_rep_labels(tf.constant(labels), batch_size).numpy()
+
+    assert rep_labels.shape == (3, seq_len, output_dim)
+    for b in range(labels.shape[0]):
+        for t in range(seq_len):
+            assert np.array_equal(rep_labels[b, t, :], labels[b])
+
+
 def test_cgan_seq_len_33():
     latent_dim = 4
     output_dim = 2
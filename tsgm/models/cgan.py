@@ -1,13 +1,11 @@
+import numpy as np
 import tensorflow as tf
 import typing as T
 from tensorflow import keras
-try:
-    import tensorflow_privacy as tf_privacy
-    __tf_privacy_available = True
-except ModuleNotFoundError:
-    __tf_privacy_available = False
 
+import functools
 import logging
+import sys
 
 import tsgm
 
@@ -16,16 +14,137 @@ logger = logging.getLogger('models')
 logger.setLevel(logging.DEBUG)
 
 
+@functools.lru_cache(maxsize=None)
+def _get_dp_optimizer_types() -> T.Tuple:
+    try:
+        import tensorflow_privacy as tf_privacy
+    except ModuleNotFoundError:
+        return ()
+    return (tf_privacy.DPKerasAdagradOptimizer, tf_privacy.DPKerasAdamOptimizer, tf_privacy.DPKerasSGDOptimizer)
+
+
 def _is_dp_optimizer(optimizer: keras.optimizers.Optimizer) -> bool:
-    return __tf_privacy_available \
-        and (isinstance(optimizer, tf_privacy.DPKerasAdagradOptimizer)
-             or isinstance(optimizer, tf_privacy.DPKerasAdamOptimizer)
-             or isinstance(optimizer, tf_privacy.DPKerasSGDOptimizer))
+    # An optimizer cannot come from `tensorflow_privacy` unless the user has imported it,
+    # so the slow import is skipped for regular optimizers
+    if "tensorflow_privacy" not in sys.modules:
+        return False
+    return isinstance(optimizer, _get_dp_optimizer_types())
+
+
+def _wrap_loss_scale_optimizer(optimizer: keras.optimizers.Optimizer, dp: bool) -> keras.optimizers.Optimizer:
+    # DP optimizers from `tensorflow.privacy` compute their own gradients and are not wrapped
+    if keras.mixed_precision.global_policy().name == "mixed_float16" and not dp \
+            and not isinstance(optimizer, keras.mixed_precision.LossScaleOptimizer):
+        return keras.mixed_precision.LossScaleOptimizer(optimizer)
+    return optimizer
+
+
+def _get_gradients(tape: tf.GradientTape, loss: tsgm.types.Tensor, variables: T.List,
+                   optimizer: keras.optimizers.Optimizer) -> T.List:
+    """
+    Computes gradients of `loss`, scaling the loss if `optimizer` is a `LossScaleOptimizer`.
+    """
+    if isinstance(optimizer, keras.mixed_precision.LossScaleOptimizer):
+        loss_scale = tf.cast(optimizer.loss_scale, loss.dtype)
+        grads = tape.gradient(loss, variables, output_gradients=loss_scale)
+        return optimizer.get_unscaled_gradients(grads)
+    return tape.gradient(loss, variables)
+
+
+def _get_apply_gradients_fn(optimizer: keras.optimizers.Optimizer, dp: bool) -> T.Callable:
+    """
+    Binds the update rule of `optimizer` once, so the training step does not branch on the optimizer type.
+    """
+    if dp:
+        # For DP optimizers from `tensorflow.privacy`
+        return lambda loss, variables, tape: optimizer.minimize(loss, variables, tape=tape)
+    return lambda loss, variables, tape: optimizer.apply_gradients(
+        zip(_get_gradients(tape, loss, variables, optimizer), variables))
+
+
+def _mean_over_non_batch_axes(losses: tsgm.types.Tensor) -> tsgm.types.Tensor:
+    """
+    Averages `losses` over all but the batch axis, in float32. Scalar losses are returned as is.
+    """
+    losses = tf.cast(losses, tf.float32)
+    if losses.shape.rank > 1:
+        losses = tf.reduce_mean(tf.reshape(losses, tf.stack([tf.shape(losses)[0], -1])), axis=1)
+    return losses
+
+
+def _get_per_example_loss(loss_fn: T.Callable, y_true: tsgm.types.Tensor, y_pred: tsgm.types.Tensor) -> tsgm.types.Tensor:
+    """
+    Evaluates `loss_fn` without reducing it over the batch: for Keras losses with the default reduction,
+    `Loss.call` returns unreduced losses. Other Keras losses and plain loss functions (e.g., `keras.losses.binary_crossentropy`)
+    are called as is, and return either a loss per example or an already reduced scalar.
+    """
+    if isinstance(loss_fn, keras.losses.Loss) \
+            and loss_fn.reduction in (keras.losses.Reduction.AUTO, keras.losses.Reduction.SUM_OVER_BATCH_SIZE):
+        return _mean_over_non_batch_axes(loss_fn.call(y_true, y_pred))
+    return _mean_over_non_batch_axes(loss_fn(y_true, y_pred))
+
+
+def _average_loss(per_example_loss: tsgm.types.Tensor, dp: bool,
+                  global_batch_size: T.Optional[int]) -> T.Tuple[tsgm.types.Tensor, tsgm.types.Tensor]:
+    """
+    Returns the loss to compute the gradients of, and the mean loss over the replica's batch for the loss trackers.
+    """
+    if per_example_loss.shape.rank == 0:
+        if dp or tf.distribute.get_strategy().num_replicas_in_sync > 1:
+            raise ValueError("DP optimizers and distributed training require a loss per example, but `loss_fn` returned a scalar. "
+                             "Use a `keras.losses.Loss` or a loss function that does not reduce over the batch.")
+        logger.warning("`loss_fn` returned a scalar, it is used as the loss without averaging over the global batch")
+        return per_example_loss, per_example_loss
+
+    mean_loss = tf.reduce_mean(per_example_loss)
+    # DP optimizers from `tensorflow.privacy` split the per-example losses into microbatches themselves
+    if dp:
+        return per_example_loss, mean_loss
+    # Average over the global batch, so gradients summed across replicas match single-device training
+    return tf.nn.compute_average_loss(per_example_loss, global_batch_size=global_batch_size), mean_loss
+
+
+def _get_batch_size(data: tsgm.types.Tensor) -> T.Union[int, tsgm.types.Tensor]:
+    """
+    Returns the static batch size if it is known when the training step is traced
+    (e.g., for datasets batched with `drop_remainder=True`), so that the traced step is specialized for it.
+    Otherwise, returns the dynamic batch size.
+    """
+    if data.shape[0] is not None:
+        return data.shape[0]
+    return tf.shape(data)[0]
+
+
+def _get_seeded_generator() -> tf.random.Generator:
+    """
+    Creates a random generator seeded from the global seed, so `tf.random.set_seed` (e.g., `tsgm.utils.fix_seeds`)
+    keeps the sampled noise reproducible.
+    The seed is drawn from the global random state, which shifts the values of later unseeded global random ops.
+    """
+    return tf.random.Generator.from_seed(int(tf.random.uniform([], maxval=2 ** 31 - 1, dtype=tf.int64)))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_static_labels(batch_size: int, value: float) -> np.ndarray:
+    return np.full((batch_size, 1), value, dtype=np.float32)
+
+
+def _get_labels(batch_size: T.Union[int, tsgm.types.Tensor], value: float) -> tsgm.types.Tensor:
+    """
+    Discriminator labels of shape `batch_size x 1` filled with `value`.
+    For a static batch size, the labels are a cached constant and add no ops to the training step.
+    """
+    if isinstance(batch_size, int):
+        return tf.constant(_get_static_labels(batch_size, value))
+    return tf.fill((batch_size, 1), value)
 
 
 class GAN(keras.Model):
     """
     GAN implementation for unlabeled time series.
+
+    The noise is sampled from a per-model `tf.random.Generator`, seeded with a draw from the global random state
+    on construction. Hence, constructing the model changes the values of later unseeded `tf.random` ops.
     """
     def __init__(self, discriminator: keras.Model, generator: keras.Model, latent_dim: int, use_wgan: bool = False) -> None:
         """
@@ -45,24 +164,28 @@ class GAN(keras.Model):
         self.generator = generator
         self.latent_dim = latent_dim
         self._seq_len = self.generator.output_shape[1]
+        self._rng = _get_seeded_generator()
         self.use_wgan = use_wgan
         self.gp_weight = 10.0
 
         self.gen_loss_tracker = keras.metrics.Mean(name="generator_loss")
         self.disc_loss_tracker = keras.metrics.Mean(name="discriminator_loss")
 
+    def _reduce_loss(self, per_example_loss: tsgm.types.Tensor) -> T.Tuple[tsgm.types.Tensor, tsgm.types.Tensor]:
+        # GAN applies the gradients of all optimizers with `apply_gradients`, so its losses are always averaged
+        return _average_loss(per_example_loss, False, self._global_batch_size)
+
+    # The WGAN losses and the gradient penalty are computed per example
     def wgan_discriminator_loss(self, real_sample, fake_sample):
-        real_loss = tf.reduce_mean(real_sample)
-        fake_loss = tf.reduce_mean(fake_sample)
-        return fake_loss - real_loss
+        return _mean_over_non_batch_axes(fake_sample) - _mean_over_non_batch_axes(real_sample)
 
     # Define the loss functions to be used for generator
     def wgan_generator_loss(self, fake_sample):
-        return -tf.reduce_mean(fake_sample)
+        return -_mean_over_non_batch_axes(fake_sample)
 
     def gradient_penalty(self, batch_size, real_samples, fake_samples):
         # get the interpolated samples
-        alpha = tf.random.normal([batch_size, 1, 1], 0.0, 1.0)
+        alpha = self._rng.normal([batch_size, 1, 1])
         diff = fake_samples - real_samples
         interpolated = real_samples + alpha * diff
         with tf.GradientTape() as gp_tape:
@@ -71,10 +194,11 @@ class GAN(keras.Model):
             pred = self.discriminator(interpolated, training=True)
 
         # 2. Calculate the gradients w.r.t to this interpolated sample.
+        #    They have the dtype of the (float32) data, also under a mixed precision policy.
         grads = gp_tape.gradient(pred, [interpolated])[0]
         # 3. Calcuate the norm of the gradients
-        norm = tf.sqrt(tf.reduce_sum(tf.square(grads), axis=[1, 2]))
-        gp = tf.reduce_mean((norm - 1.0) ** 2)
+        norm = tf.math.reduce_euclidean_norm(grads, axis=[1, 2])
+        gp = (norm - 1.0) ** 2
         return gp
 
     @property
@@ -85,21 +209,32 @@ class GAN(keras.Model):
         return [self.gen_loss_tracker, self.disc_loss_tracker]
 
     def compile(self, d_optimizer: keras.optimizers.Optimizer, g_optimizer: keras.optimizers.Optimizer,
-                loss_fn: keras.losses.Loss) -> None:
+                loss_fn: keras.losses.Loss, jit_compile: bool = False, global_batch_size: T.Optional[int] = None) -> None:
         """
         Compiles the generator and discriminator models.
 
+        For multi-GPU training, create and compile the model under `with strategy.scope():`
+        (e.g., `tf.distribute.MirroredStrategy`); the losses are then averaged over the global batch.
+        If the global policy is `mixed_float16` (see `keras.mixed_precision.set_global_policy`),
+        non-DP optimizers are wrapped into `keras.mixed_precision.LossScaleOptimizer`.
+        For datasets batched with `drop_remainder=True`, the training step is traced for the static batch size.
+
         :param d_optimizer: An optimizer for the GAN's discriminator.
         :type d_optimizer: keras.Model
         :param g_optimizer: An optimizer for the GAN's generator.
         :type generator: keras.Model
         :param loss_fn: Loss function.
         :type loss_fn: keras.losses.Loss
+        :param jit_compile: Compile the training step with XLA. Requires architectures with static shapes
+            (e.g., WaveGAN with phase shuffle is not supported).
+        :type jit_compile: bool
+        :param global_batch_size: The batch size summed over all replicas. If None, it is inferred from
+            the per-replica batch and the number of replicas in the current strategy.
+        :type global_batch_size: T.Optional[int]
         """
-        super(GAN, self).compile()
-        self.d_optimizer = d_optimizer
-        self.g_optimizer = g_optimizer
+        super(GAN, self).compile(jit_compile=jit_compile)
         self.loss_fn = loss_fn
+        self._global_batch_size = global_batch_size
 
         generator_dp = _is_dp_optimizer(d_optimizer)
         discriminator_dp = _is_dp_optimizer(g_optimizer)
@@ -108,10 +243,17 @@ class GAN(keras.Model):
             logger.warning(f"One of the optimizers is DP and another one is not. generator_dp={generator_dp}, discriminator_dp={discriminator_dp}")
 
         self.dp = generator_dp and discriminator_dp
+        if self.dp:
+            logger.warning("GAN does not compute DP gradients, use ConditionalGAN for training with DP optimizers")
+        self.d_optimizer = _wrap_loss_scale_optimizer(d_optimizer, self.dp)
+        self.g_optimizer = _wrap_loss_scale_optimizer(g_optimizer, self.dp)
+        self._apply_d = _get_apply_gradients_fn(self.d_optimizer, dp=False)
+        self._apply_g = _get_apply_gradients_fn(self.g_optimizer, dp=False)
 
     def _get_random_vector_labels(self, batch_size: int, labels=None) -> tsgm.types.Tensor:
-        return tf.random.normal(shape=(batch_size, self.latent_dim))
+        return self._rng.normal(shape=(batch_size, self.latent_dim))
 
+    @tf.function(reduce_retracing=True)
     def train_step(self, data: tsgm.types.Tensor) -> T.Dict[str, float]:
         """
         Performs a training step using a batch of data, stored in data.
@@ -123,61 +265,52 @@ class GAN(keras.Model):
         :rtype: T.Dict[str, float]
         """
         real_data = data
-        batch_size = tf.shape(real_data)[0]
-        # Generate ts
+        batch_size = _get_batch_size(real_data)
         random_vector = self._get_random_vector_labels(batch_size)
-        fake_data = self.generator(random_vector)
-
-        combined_data = tf.concat(
-            [fake_data, real_data], axis=0
-        )
 
-        # Labels for descriminator
-        # 1 == real data
-        # 0 == fake data
-        desc_labels = tf.concat(
-            [tf.ones((batch_size, 1)), tf.zeros((batch_size, 1))], axis=0
-        )
-        with tf.GradientTape() as tape:
-            predictions = self.discriminator(combined_data)
+        if not self.use_wgan:
+            # Labels for descriminator
+            # 1 == fake data
+            # 0 == real data
+            fake_labels, real_labels = _get_labels(batch_size, 1.0), _get_labels(batch_size, 0.0)
+            # Pretend that all samples are real
+            misleading_labels = real_labels
+
+        # A single persistent tape records both losses: the discriminator and the generator
+        # have disjoint trainable weights, so the generated samples and their predictions are shared
+        with tf.GradientTape(persistent=True) as tape:
+            # Generate ts, under a mixed precision policy the generator outputs its (e.g., float16) compute dtype
+            fake_data = tf.cast(self.generator(random_vector), real_data.dtype)
             if self.use_wgan:
-                fake_logits = self.discriminator(fake_data, training=True)
-                # Get the logits for the real samples
-                real_logits = self.discriminator(real_data, training=True)
+                # Get the logits for the real and fake samples in a single discriminator call
+                both = tf.concat([real_data, fake_data], axis=0)
+                logits = tf.cast(self.discriminator(both, training=True), tf.float32)
+                real_logits, fake_logits = tf.split(logits, 2, axis=0)
 
                 # Calculate the discriminator loss using the fake and real sample logits
                 d_cost = self.wgan_discriminator_loss(real_logits, fake_logits)
-                # Calculate the gradient penalty
-                gp = self.gradient_penalty(batch_size, real_data, fake_data)
+                # Calculate the gradient penalty, it only updates the discriminator
+                gp = self.gradient_penalty(batch_size, real_data, tf.stop_gradient(fake_data))
                 # Add the gradient penalty to the original discriminator loss
-                d_loss = d_cost + gp * self.gp_weight
-            else:
-                d_loss = self.loss_fn(desc_labels, predictions)
-        grads = tape.gradient(d_loss, self.discriminator.trainable_weights)
-        self.d_optimizer.apply_gradients(
-            zip(grads, self.discriminator.trainable_weights)
-        )
-
-        random_vector = self._get_random_vector_labels(batch_size=batch_size)
-
-        # Pretend that all samples are real
-        misleading_labels = tf.zeros((batch_size, 1))
-
-        # Train generator (with updating the discriminator)
-        with tf.GradientTape() as tape:
-            fake_data = self.generator(random_vector)
-            predictions = self.discriminator(fake_data)
-            if self.use_wgan:
+                d_loss, d_loss_mean = self._reduce_loss(d_cost + gp * self.gp_weight)
                 # uses logits
-                g_loss = self.wgan_generator_loss(predictions)
+                g_loss, g_loss_mean = self._reduce_loss(self.wgan_generator_loss(fake_logits))
             else:
-                g_loss = self.loss_fn(misleading_labels, predictions)
-
-        grads = tape.gradient(g_loss, self.generator.trainable_weights)
-        self.g_optimizer.apply_gradients(zip(grads, self.generator.trainable_weights))
-
-        self.gen_loss_tracker.update_state(g_loss)
-        self.disc_loss_tracker.update_state(d_loss)
+                # Separate discriminator calls avoid allocating a concatenated batch
+                fake_predictions = tf.cast(self.discriminator(fake_data), tf.float32)
+                real_predictions = tf.cast(self.discriminator(real_data), tf.float32)
+                fake_loss = _get_per_example_loss(self.loss_fn, fake_labels, fake_predictions)
+                real_loss = _get_per_example_loss(self.loss_fn, real_labels, real_predictions)
+                d_loss, d_loss_mean = self._reduce_loss((fake_loss + real_loss) / 2)
+                g_loss, g_loss_mean = self._reduce_loss(_get_per_example_loss(self.loss_fn, misleading_labels, fake_predictions))
+
+        self._apply_d(d_loss, self.discriminator.trainable_weights, tape)
+        self._apply_g(g_loss, self.generator.trainable_weights, tape)
+        del tape
+
+        # The trackers average the unscaled losses of the replica's batch
+        self.gen_loss_tracker.update_state(g_loss_mean)
+        self.disc_loss_tracker.update_state(d_loss_mean)
         return {
             "g_loss": self.gen_loss_tracker.result(),
             "d_loss": self.disc_loss_tracker.result(),
@@ -211,11 +344,15 @@ class GAN(keras.Model):
 class ConditionalGAN(keras.Model):
     """
     Conditional GAN implementation for labeled and temporally labeled time series.
+
+    As for `GAN`, the noise generator is seeded with a draw from the global random state on construction,
+    which changes the values of later unseeded `tf.random` ops.
     """
     def __init__(self, discriminator: keras.Model, generator: keras.Model, latent_dim: int, temporal=False, use_wgan=False) -> None:
         """
         :param discriminator: A discriminator model which takes a time series as input and check
-            whether the sample is real or fake.
+            whether the sample is real or fake. The labels are either concatenated to the time series
+            along the feature axis or, if the discriminator has two inputs, passed as its second input.
         :type discriminator: keras.Model
         :param generator: Takes as input a random noise vector of `latent_dim` length and return
             a simulated time-series.
@@ -230,6 +367,9 @@ class ConditionalGAN(keras.Model):
         self.generator = generator
         self.latent_dim = latent_dim
         self._seq_len = self.generator.output_shape[1]
+        self._seq_len_t = tf.constant(self._seq_len, tf.int32)
+        self._rng = _get_seeded_generator()
+        self._discriminator_takes_labels = len(getattr(self.discriminator, "inputs", None) or []) == 2
 
         self.gen_loss_tracker = keras.metrics.Mean(name="generator_loss")
         self.disc_loss_tracker = keras.metrics.Mean(name="discriminator_loss")
@@ -243,22 +383,33 @@ class ConditionalGAN(keras.Model):
         """
         return [self.gen_loss_tracker, self.disc_loss_tracker]
 
-    def compile(self, d_optimizer: keras.optimizers.Optimizer, g_optimizer: keras.optimizers.Optimizer, loss_fn: T.Callable) -> None:
+    def compile(self, d_optimizer: keras.optimizers.Optimizer, g_optimizer: keras.optimizers.Optimizer, loss_fn: T.Callable,
+                jit_compile: bool = False, global_batch_size: T.Optional[int] = None) -> None:
         """
         Compiles the generator and discriminator models.
 
+        For multi-GPU training, create and compile the model under `with strategy.scope():`
+        (e.g., `tf.distribute.MirroredStrategy`); the losses are then averaged over the global batch.
+        If the global policy is `mixed_float16` (see `keras.mixed_precision.set_global_policy`),
+        non-DP optimizers are wrapped into `keras.mixed_precision.LossScaleOptimizer`.
+
         :param d_optimizer: An optimizer for the GAN's discriminator.
         :type d_optimizer: keras.Model
         :param g_optimizer: An optimizer for the GAN's generator.
         :type generator: keras.Model
-        :param loss_fn: Loss function.
-        :type loss_fn: keras.losses.Loss
+        :param loss_fn: Loss function. A callable returning a scalar instead of a loss per example
+            is supported for single-device training without DP optimizers.
+        :type loss_fn: T.Callable
+        :param jit_compile: Compile the training step with XLA. Requires architectures with static shapes.
+        :type jit_compile: bool
+        :param global_batch_size: The batch size summed over all replicas. If None, it is inferred from
+            the per-replica batch and the number of replicas in the current strategy.
+        :type global_batch_size: T.Optional[int]
         """
         # TODO: move `.compile logic to a base GAN class
-        super(ConditionalGAN, self).compile()
-        self.d_optimizer = d_optimizer
-        self.g_optimizer = g_optimizer
+        super(ConditionalGAN, self).compile(jit_compile=jit_compile)
         self.loss_fn = loss_fn
+        self._global_batch_size = global_batch_size
 
         generator_dp = _is_dp_optimizer(d_optimizer)
         discriminator_dp = _is_dp_optimizer(g_optimizer)
@@ -267,15 +418,22 @@ class ConditionalGAN(keras.Model):
             logger.warning(f"One of the optimizers is DP and another one is not. generator_dp={generator_dp}, discriminator_dp={discriminator_dp}")
 
         self.dp = generator_dp and discriminator_dp
+        self.d_optimizer = _wrap_loss_scale_optimizer(d_optimizer, self.dp)
+        self.g_optimizer = _wrap_loss_scale_optimizer(g_optimizer, self.dp)
+        self._apply_d = _get_apply_gradients_fn(self.d_optimizer, self.dp)
+        self._apply_g = _get_apply_gradients_fn(self.g_optimizer, self.dp)
+
+    def _reduce_loss(self, per_example_loss: tsgm.types.Tensor) -> T.Tuple[tsgm.types.Tensor, tsgm.types.Tensor]:
+        return _average_loss(per_example_loss, self.dp, self._global_batch_size)
 
     def _get_random_vector_labels(self, batch_size: int, labels: tsgm.types.Tensor) -> None:
         if self._temporal:
-            random_latent_vectors = tf.random.normal(shape=(batch_size, self._seq_len, self.latent_dim))
+            random_latent_vectors = self._rng.normal(shape=tf.stack([batch_size, self._seq_len_t, self.latent_dim]))
             random_vector_labels = tf.concat(
                 [random_latent_vectors, labels[:, :, None]], axis=2
             )
         else:
-            random_latent_vectors = tf.random.normal(shape=(batch_size, self.latent_dim))
+            random_latent_vectors = self._rng.normal(shape=(batch_size, self.latent_dim))
             random_vector_labels = tf.concat(
                 [random_latent_vectors, labels], axis=1
             )
@@ -290,6 +448,21 @@ class ConditionalGAN(keras.Model):
         else:
             return labels.shape[1]
 
+    def _get_rep_labels(self, labels: tsgm.types.Tensor, batch_size: T.Union[int, tsgm.types.Tensor]) -> tsgm.types.Tensor:
+        """
+        Labels of shape `batch_size x seq_len x output_dim`, repeated over time for non-temporal labels.
+        """
+        output_dim = self._get_output_shape(labels)
+        if not self._temporal:
+            return tf.broadcast_to(
+                labels[:, None, :], tf.stack([batch_size, self._seq_len_t, output_dim])
+            )
+        else:
+            return tf.reshape(
+                labels, tf.stack([-1, self._seq_len_t, output_dim])
+            )
+
+    @tf.function(reduce_retracing=True)
     def train_step(self, data: T.Tuple) -> T.Dict[str, float]:
         """
         Performs a training step using a batch of data, stored in data.
@@ -301,72 +474,49 @@ class ConditionalGAN(keras.Model):
         :rtype: T.Dict[str, float]
         """
         real_ts, labels = data
-        output_dim = self._get_output_shape(labels)
-        batch_size = tf.shape(real_ts)[0]
-        if not self._temporal:
-            rep_labels = labels[:, :, None]
-            rep_labels = tf.repeat(
-                rep_labels, repeats=[self._seq_len]
-            )
-        else:
-            rep_labels = labels
-
-        rep_labels = tf.reshape(
-            rep_labels, (-1, self._seq_len, output_dim)
-        )
+        batch_size = _get_batch_size(real_ts)
+        rep_labels = self._get_rep_labels(labels, batch_size)
 
-        # Generate ts
         random_vector_labels = self._get_random_vector_labels(batch_size=batch_size, labels=labels)
-        generated_ts = self.generator(random_vector_labels)
-
-        fake_data = tf.concat([generated_ts, rep_labels], -1)
-        real_data = tf.concat([real_ts, rep_labels], -1)
-        combined_data = tf.concat(
-            [fake_data, real_data], axis=0
-        )
 
         # Labels for descriminator
-        # 1 == real data
-        # 0 == fake data
-        desc_labels = tf.concat(
-            [tf.ones((batch_size, 1)), tf.zeros((batch_size, 1))], axis=0
-        )
-
-        with tf.GradientTape() as tape:
-            predictions = self.discriminator(combined_data)
-            d_loss = self.loss_fn(desc_labels, predictions)
-
-        if self.dp:
-            # For DP optimizers from `tensorflow.privacy`
-            self.d_optimizer.minimize(d_loss, self.discriminator.trainable_weights, tape=tape)
-        else:
-            grads = tape.gradient(d_loss, self.discriminator.trainable_weights)
-
-            self.d_optimizer.apply_gradients(
-                zip(grads, self.discriminator.trainable_weights)
-            )
-
-        random_vector_labels = self._get_random_vector_labels(batch_size=batch_size, labels=labels)
-
+        # 1 == fake data
+        # 0 == real data
+        fake_labels, real_labels = _get_labels(batch_size, 1.0), _get_labels(batch_size, 0.0)
         # Pretend that all samples are real
-        misleading_labels = tf.zeros((batch_size, 1))
-
-        # Train generator (with updating the discriminator)
-        with tf.GradientTape() as tape:
-            fake_samples = self.generator(random_vector_labels)
-            fake_data = tf.concat([fake_samples, rep_labels], -1)
-            predictions = self.discriminator(fake_data)
-            g_loss = self.loss_fn(misleading_labels, predictions)
-
-        if self.dp:
-            # For DP optimizers from `tensorflow.privacy`
-            self.g_optimizer.minimize(g_loss, self.generator.trainable_weights, tape=tape)
-        else:
-            grads = tape.gradient(g_loss, self.generator.trainable_weights)
-            self.g_optimizer.apply_gradients(zip(grads, self.generator.trainable_weights))
-
-        self.gen_loss_tracker.update_state(g_loss)
-        self.disc_loss_tracker.update_state(d_loss)
+        misleading_labels = real_labels
+
+        # A single persistent tape records both losses: the discriminator and the generator
+        # have disjoint trainable weights, so the generated samples and their predictions are shared
+        with tf.GradientTape(persistent=True) as tape:
+            # Generate ts, under a mixed precision policy the generator outputs its (e.g., float16) compute dtype
+            generated_ts = tf.cast(self.generator(random_vector_labels), real_ts.dtype)
+
+            # Separate discriminator calls avoid allocating a concatenated batch
+            if self._discriminator_takes_labels:
+                # The discriminator joins the time series and the labels itself
+                fake_predictions = self.discriminator([generated_ts, rep_labels])
+                real_predictions = self.discriminator([real_ts, rep_labels])
+            else:
+                fake_data = tf.concat([generated_ts, rep_labels], -1)
+                real_data = tf.concat([real_ts, rep_labels], -1)
+                fake_predictions = self.discriminator(fake_data)
+                real_predictions = self.discriminator(real_data)
+            # Compute the losses in float32
+            fake_predictions = tf.cast(fake_predictions, tf.float32)
+            real_predictions = tf.cast(real_predictions, tf.float32)
+            fake_loss = _get_per_example_loss(self.loss_fn, fake_labels, fake_predictions)
+            real_loss = _get_per_example_loss(self.loss_fn, real_labels, real_predictions)
+            d_loss, d_loss_mean = self._reduce_loss((fake_loss + real_loss) / 2)
+            g_loss, g_loss_mean = self._reduce_loss(_get_per_example_loss(self.loss_fn, misleading_labels, fake_predictions))
+
+        self._apply_d(d_loss, self.discriminator.trainable_weights, tape)
+        self._apply_g(g_loss, self.generator.trainable_weights, tape)
+        del tape
+
+        # The trackers average the unscaled losses of the replica's batch
+        self.gen_loss_tracker.update_state(g_loss_mean)
+        self.disc_loss_tracker.update_state(d_loss_mean)
         return {
             "g_loss": self.gen_loss_tracker.result(),
             "d_loss": self.disc_loss_tracker.result(),